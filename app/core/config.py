@@ -3,6 +3,7 @@
 通过环境变量加载应用配置
 """
 import os
+from functools import lru_cache
 from typing import Optional
 from pydantic_settings import BaseSettings
 
@@ -21,9 +22,22 @@ class Settings(BaseSettings):
     DEBUG: bool = False
     
     # 缓存配置
-    CACHE_TTL: int = 300  # 缓存时间（秒）
+    QUOTE_TTL: int = 5  # 全市场实时行情快照缓存时间（秒）
+    TECHNICAL_TTL: int = 60  # 技术面数据缓存时间（秒）
+    VALUATION_TTL: int = 300  # 估值数据缓存时间（秒）
+    SENTIMENT_TTL: int = 300  # 消息面数据缓存时间（秒）
+    FUNDAMENTAL_TTL: int = 3600  # 基本面数据缓存时间（秒）
+    CACHE_STALE_TTL: int = 300  # 报告过期后仍可先返回旧数据、同时后台刷新的时间窗口（秒）
     MAX_CACHE_SIZE: int = 1000  # 最大缓存条目数
     
+    # Redis共享缓存配置（多工作进程部署时使用）
+    REDIS_URL: Optional[str] = None  # 例如 redis://localhost:6379/0，为空时不启用
+    L1_CACHE_TTL: int = 2  # 启用Redis时进程内缓存的新鲜期（秒）
+    REDIS_FALLBACK_TTL: int = 86400  # 报告在Redis中的保留时间，数据源不可用时可返回过期报告（秒）
+    PARTIAL_FALLBACK_TTL: int = 600  # 部分维度获取为空时，优先返回Redis中过期报告的最长时间（秒）
+    REDIS_SOCKET_TIMEOUT: float = 0.2  # Redis读写超时时间（秒），超时视为缓存未命中
+    REDIS_CONNECT_TIMEOUT: float = 0.2  # Redis连接超时时间（秒）
+    
     # API配置
     API_V1_PREFIX: str = "/api/v1"
     
@@ -36,5 +50,16 @@ class Settings(BaseSettings):
         case_sensitive = True
 
 
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """
+    获取配置实例，环境变量只在首次调用时读取
+    
+    注意：模块级的 settings 以及 stock_service 中的缓存时间等常量在导入时绑定，
+    调用 get_settings.cache_clear() 不会改变它们，修改这些配置需要重启进程
+    """
+    return Settings()
+
+
 # 全局配置实例
-settings = Settings() 
\ No newline at end of file
+settings = get_settings() 
\ No newline at end of file
@@ -2,12 +2,17 @@
 DataQuark Stock Analysis API
 FastAPI应用实例和API路由定义
 """
+import hashlib
 import logging
+import time
+from contextlib import asynccontextmanager
 from datetime import datetime
-from fastapi import FastAPI, HTTPException, Query, status
+from typing import Optional
+from fastapi import FastAPI, HTTPException, Query, Request, Response, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 from pydantic import ValidationError
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from app.core.config import settings
 from app.models.stock_models import StockReport, ErrorResponse
@@ -20,6 +25,13 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """应用生命周期：关闭时释放缓存连接"""
+    yield
+    await stock_service.close()
+
+
 # 创建FastAPI应用实例
 app = FastAPI(
     title=settings.APP_NAME,
@@ -27,9 +39,63 @@ app = FastAPI(
     description=settings.APP_DESCRIPTION,
     docs_url="/docs",
     redoc_url="/redoc",
-    openapi_url="/openapi.json"
+    openapi_url="/openapi.json",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
+
+class StockExceptionMiddleware:
+    """ASGI异常处理中间件，将数据验证和股票服务异常转换为JSON错误响应"""
+    
+    # 异常类型 -> (HTTP状态码, 日志前缀, 错误详情前缀, 日志级别)
+    _EXCEPTION_RESPONSES = {
+        ValidationError: (status.HTTP_400_BAD_REQUEST, "数据验证错误: ", "请求数据格式错误: ", logging.ERROR),
+        StockNotFoundError: (status.HTTP_404_NOT_FOUND, "股票未找到: ", "", logging.WARNING),
+        StockDataError: (status.HTTP_500_INTERNAL_SERVER_ERROR, "股票数据获取错误: ", "股票数据获取失败: ", logging.ERROR),
+    }
+    
+    def __init__(self, app: ASGIApp):
+        self.app = app
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        response_started = False
+        
+        async def send_wrapper(message: Message):
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+        
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except (ValidationError, StockNotFoundError, StockDataError) as exc:
+            # 响应已开始发送时无法再返回错误响应
+            if response_started:
+                raise
+            
+            exc_response = self._EXCEPTION_RESPONSES.get(exc.__class__)
+            if exc_response is None:
+                # 异常子类按继承关系查找
+                exc_response = next(value for exc_type, value in self._EXCEPTION_RESPONSES.items()
+                                    if isinstance(exc, exc_type))
+            status_code, log_prefix, detail_prefix, log_level = exc_response
+            
+            logger.log(log_level, f"{log_prefix}{exc}")
+            response = ORJSONResponse(
+                status_code=status_code,
+                content={"detail": f"{detail_prefix}{str(exc)}"}
+            )
+            await response(scope, receive, send)
+
+
+# 添加异常处理中间件（在CORS中间件内层，错误响应同样带有CORS头）
+app.add_middleware(StockExceptionMiddleware)
+
 # 添加CORS中间件
 app.add_middleware(
     CORSMiddleware,
@@ -40,34 +106,25 @@ app.add_middleware(
 )
 
 
-@app.exception_handler(ValidationError)
-async def validation_exception_handler(request, exc):
-    """处理数据验证异常"""
-    logger.error(f"数据验证错误: {exc}")
-    return JSONResponse(
-        status_code=status.HTTP_400_BAD_REQUEST,
-        content={"detail": f"请求数据格式错误: {str(exc)}"}
-    )
+# HTTP缓存策略：基本信息端点内容固定，使用长缓存；完整报告按报告剩余新鲜期计算（见 _full_report_cache_control）
+STOCK_INFO_CACHE_CONTROL = f"public, max-age={settings.FUNDAMENTAL_TTL}"
 
 
-@app.exception_handler(StockNotFoundError)
-async def stock_not_found_exception_handler(request, exc):
-    """处理股票未找到异常"""
-    logger.warning(f"股票未找到: {exc}")
-    return JSONResponse(
-        status_code=status.HTTP_404_NOT_FOUND,
-        content={"detail": str(exc)}
-    )
+def _full_report_cache_control(report: StockReport) -> str:
+    """根据报告剩余新鲜期生成Cache-Control，过期数据要求下游缓存重新验证"""
+    max_age = int(report.fresh_until - time.time())
+    if report.is_stale or max_age <= 0:
+        return "no-cache"
+    return f"public, max-age={max_age}, stale-while-revalidate={settings.CACHE_STALE_TTL}"
 
 
-@app.exception_handler(StockDataError)
-async def stock_data_exception_handler(request, exc):
-    """处理股票数据获取异常"""
-    logger.error(f"股票数据获取错误: {exc}")
-    return JSONResponse(
-        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-        content={"detail": f"股票数据获取失败: {str(exc)}"}
-    )
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """检查请求的If-None-Match头是否与ETag匹配（弱比较）"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
 
 
 @app.get("/", tags=["根路径"])
@@ -94,6 +151,8 @@ async def health_check():
 @app.get(
     f"{settings.API_V1_PREFIX}/stock/full-report",
     response_model=StockReport,
+    # 未获取到的指标不输出，减小响应体积
+    response_model_exclude_none=True,
     responses={
         400: {"model": ErrorResponse, "description": "请求参数错误"},
         404: {"model": ErrorResponse, "description": "股票未找到"},
@@ -104,6 +163,8 @@ async def health_check():
     description="根据股票代码获取包含基本面、估值、技术面和消息面四大维度的完整分析数据"
 )
 async def get_stock_full_report(
+    request: Request,
+    response: Response,
     code: str = Query(
         ...,
         pattern=r"^\d{6}$",
@@ -129,36 +190,29 @@ async def get_stock_full_report(
     ```
     """
     try:
-        # 验证股票代码格式
-        if not code or len(code) != 6 or not code.isdigit():
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="股票代码格式错误，必须为6位数字"
-            )
-        
         logger.info(f"接收到股票分析请求: {code}")
         
         # 获取股票完整报告
         report = await stock_service.get_full_stock_report(code)
         
+        # 同一份报告（含缓存）的ETag不变，客户端和CDN可据此复用响应
+        etag = '"' + hashlib.md5(f"{report.code}:{report.update_time.isoformat()}".encode()).hexdigest() + '"'
+        headers = {"ETag": etag, "Cache-Control": _full_report_cache_control(report)}
+        if report.is_stale:
+            # 数据源不可用时返回的是过期缓存
+            headers["Warning"] = '110 - "Response is Stale"'
+        
+        if _etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        
+        response.headers.update(headers)
+        
         logger.info(f"成功返回股票分析报告: {code} - {report.name}")
         return report
         
-    except StockNotFoundError as e:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=str(e)
-        )
-    except StockDataError as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=str(e)
-        )
-    except ValidationError as e:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"请求数据验证失败: {str(e)}"
-        )
+    except (StockNotFoundError, StockDataError, ValidationError):
+        # 由StockExceptionMiddleware统一转换为错误响应
+        raise
     except Exception as e:
         logger.error(f"未知错误: {str(e)}")
         raise HTTPException(
@@ -169,6 +223,7 @@ async def get_stock_full_report(
 
 @app.get(f"{settings.API_V1_PREFIX}/stock/info", tags=["股票信息"])
 async def get_stock_basic_info(
+    response: Response,
     code: str = Query(
         ...,
         pattern=r"^\d{6}$",
@@ -178,14 +233,9 @@ async def get_stock_basic_info(
 ):
     """获取股票基本信息（简化版）"""
     try:
-        if not code or len(code) != 6 or not code.isdigit():
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="股票代码格式错误，必须为6位数字"
-            )
-        
         # 这里可以实现简化版的股票信息获取
         # 为了演示，我们返回一个简单的信息
+        response.headers["Cache-Control"] = STOCK_INFO_CACHE_CONTROL
         return {
             "code": code,
             "message": "股票基本信息功能暂未实现，请使用 /full-report 获取完整信息",
@@ -201,11 +251,18 @@ async def get_stock_basic_info(
 
 
 if __name__ == "__main__":
+    import os
+    import sys
     import uvicorn
     uvicorn.run(
         "app.main:app",
         host=settings.HOST,
         port=settings.PORT,
         reload=settings.DEBUG,
+        # uvloop不支持Windows，该平台下使用标准asyncio事件循环
+        loop="asyncio" if sys.platform == "win32" else "uvloop",
+        http="httptools",
+        # 调试模式下启用自动重载，只能使用单进程
+        workers=1 if settings.DEBUG else (os.cpu_count() or 1) * 2 + 1,
         log_level="info"
     ) 
\ No newline at end of file
@@ -4,7 +4,7 @@
 """
 from datetime import datetime
 from typing import Optional, Dict, Any, List
-from pydantic import BaseModel, Field, validator
+from pydantic import BaseModel, Field, PrivateAttr
 
 
 class ErrorResponse(BaseModel):
@@ -152,7 +152,7 @@ class SentimentAnalysis(BaseModel):
 class StockReport(BaseModel):
     """股票完整报告数据模型"""
     # 基本信息
-    code: str = Field(..., description="股票代码")
+    code: str = Field(..., description="股票代码", pattern=r"^\d{6}$")
     name: str = Field(..., description="股票名称")
     update_time: datetime = Field(..., description="数据更新时间")
     
@@ -162,21 +162,31 @@ class StockReport(BaseModel):
     technical_analysis: TechnicalAnalysis = Field(..., description="技术面分析")
     sentiment_analysis: SentimentAnalysis = Field(..., description="消息面分析")
     
-    @validator('code')
-    def validate_stock_code(cls, v):
-        """验证股票代码格式"""
-        if not v or len(v) != 6 or not v.isdigit():
-            raise ValueError('股票代码必须为6位数字')
-        return v
+    # 以下属性不参与序列化
+    # 数据源不可用时返回的过期缓存报告会被标记
+    _stale: bool = PrivateAttr(default=False)
+    # 报告的新鲜期截止时间（Unix时间戳），未写入缓存的报告为0
+    _fresh_until: float = PrivateAttr(default=0.0)
+    
+    @property
+    def is_stale(self) -> bool:
+        """是否为数据源不可用时返回的过期报告"""
+        return self._stale
+    
+    @property
+    def fresh_until(self) -> float:
+        """报告的新鲜期截止时间（Unix时间戳）"""
+        return self._fresh_until
+    
+    def mark_stale(self):
+        """标记为过期报告"""
+        self._stale = True
+    
+    def set_fresh_until(self, timestamp: float):
+        """设置报告的新鲜期截止时间"""
+        self._fresh_until = timestamp
 
 
 class StockCodeRequest(BaseModel):
     """股票代码请求模型"""
     code: str = Field(..., description="股票代码", pattern=r"^\d{6}$")
-    
-    @validator('code')
-    def validate_stock_code(cls, v):
-        """验证股票代码格式"""
-        if not v or len(v) != 6 or not v.isdigit():
-            raise ValueError('股票代码必须为6位数字')
-        return v 
\ No newline at end of file
@@ -0,0 +1,68 @@
+"""
+共享缓存模块
+基于Redis的股票报告缓存，供多个工作进程共享
+"""
+import asyncio
+import logging
+import time
+from typing import Optional, Tuple
+
+import orjson
+import redis.asyncio as redis
+from pydantic import ValidationError
+
+from app.models.stock_models import StockReport
+
+logger = logging.getLogger(__name__)
+
+
+class RedisCache:
+    """Redis股票报告缓存"""
+
+    def __init__(self, url: str, key_prefix: str = "dataquark:report:",
+                 socket_timeout: float = 0.2, socket_connect_timeout: float = 0.2):
+        # 超时时间很短，Redis响应缓慢时按缓存未命中处理，不拖慢请求
+        self._client = redis.Redis.from_url(
+            url,
+            decode_responses=False,
+            socket_timeout=socket_timeout,
+            socket_connect_timeout=socket_connect_timeout,
+        )
+        self._key_prefix = key_prefix
+
+    def _get_key(self, stock_code: str) -> str:
+        """生成缓存键"""
+        return f"{self._key_prefix}{stock_code}"
+
+    async def get_report(self, stock_code: str) -> Optional[Tuple[StockReport, float]]:
+        """获取缓存的报告及其新鲜期截止时间（Unix时间戳），未命中或Redis不可用时返回None"""
+        try:
+            payload = await self._client.get(self._get_key(stock_code))
+        except (redis.RedisError, asyncio.TimeoutError, OSError) as e:
+            logger.warning(f"读取Redis缓存失败: {stock_code}, 错误: {str(e)}")
+            return None
+
+        if payload is None:
+            return None
+
+        try:
+            data = orjson.loads(payload)
+            return StockReport.model_validate(data["report"]), data["fresh_until"]
+        except (orjson.JSONDecodeError, KeyError, TypeError, ValidationError) as e:
+            logger.warning(f"Redis缓存数据无法解析: {stock_code}, 错误: {str(e)}")
+            return None
+
+    async def set_report(self, report: StockReport, fresh_ttl: int, ttl: int):
+        """写入报告，fresh_ttl秒内视为新鲜，ttl秒后由Redis删除"""
+        payload = orjson.dumps({
+            "report": report.model_dump(mode="json"),
+            "fresh_until": time.time() + fresh_ttl,
+        })
+        try:
+            await self._client.set(self._get_key(report.code), payload, ex=ttl)
+        except (redis.RedisError, asyncio.TimeoutError, OSError) as e:
+            logger.warning(f"写入Redis缓存失败: {report.code}, 错误: {str(e)}")
+
+    async def close(self):
+        """关闭Redis连接"""
+        await self._client.aclose()
@@ -3,23 +3,55 @@
 封装所有与akshare交互和数据处理的函数
 """
 import asyncio
+import heapq
 import logging
+import time
 import traceback
-from datetime import datetime
-from functools import lru_cache
-from typing import Optional, Dict, Any
+from datetime import datetime, timedelta, time as dt_time
+from typing import Optional, Dict, Any, List, Tuple, Callable, Awaitable
+from zoneinfo import ZoneInfo
+import numpy as np
 import pandas as pd
 import akshare as ak
+from pydantic import BaseModel
 from app.models.stock_models import (
     StockReport, FundamentalAnalysis, ValuationAnalysis, 
     TechnicalAnalysis, SentimentAnalysis
 )
 from app.core.config import settings
+from app.services.cache import RedisCache
 
 # 配置日志
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# 热路径上频繁使用的配置项，绑定为模块级常量以减少属性查找（导入时确定，运行期间不再变化）
+_QUOTE_TTL = settings.QUOTE_TTL
+_TECHNICAL_TTL = settings.TECHNICAL_TTL
+_VALUATION_TTL = settings.VALUATION_TTL
+_SENTIMENT_TTL = settings.SENTIMENT_TTL
+_FUNDAMENTAL_TTL = settings.FUNDAMENTAL_TTL
+_CACHE_STALE_TTL = settings.CACHE_STALE_TTL
+_MAX_CACHE = settings.MAX_CACHE_SIZE
+_L1_CACHE_TTL = settings.L1_CACHE_TTL
+_REDIS_FALLBACK_TTL = settings.REDIS_FALLBACK_TTL
+_PARTIAL_FALLBACK_TTL = settings.PARTIAL_FALLBACK_TTL
+# 报告的新鲜期取各维度缓存时间的最小值
+_REPORT_TTL = min(_FUNDAMENTAL_TTL, _VALUATION_TTL, _TECHNICAL_TTL, _SENTIMENT_TTL)
+
+# 数值字符串中需要去除的千分位和百分号
+_NUM_STRIP = str.maketrans('', '', ',%')
+
+# A股收盘时间（北京时间），日线数据在收盘后才最终确定
+_MARKET_TZ = ZoneInfo("Asia/Shanghai")
+_MARKET_CLOSE = dt_time(15, 0)
+
+# 全市场实时行情快照缓存，所有请求共享
+_spot_cache = {"df": None, "ts": 0.0, "lock": asyncio.Lock()}
+
+# 股票基本信息缓存: stock_code -> (info_dict, expires_at)
+_stock_info_cache: Dict[str, Tuple[Dict[str, Any], float]] = {}
+
 
 class StockDataError(Exception):
     """股票数据获取异常"""
@@ -31,61 +63,211 @@ class StockNotFoundError(Exception):
     pass
 
 
+async def _get_spot_snapshot() -> pd.DataFrame:
+    """获取全市场实时行情快照（按股票代码索引）"""
+    if _spot_cache["df"] is not None and time.monotonic() - _spot_cache["ts"] < _QUOTE_TTL:
+        return _spot_cache["df"]
+    
+    async with _spot_cache["lock"]:
+        # 获取锁后再次检查，避免并发请求重复下载
+        if _spot_cache["df"] is not None and time.monotonic() - _spot_cache["ts"] < _QUOTE_TTL:
+            return _spot_cache["df"]
+        
+        spot_data = await asyncio.to_thread(ak.stock_zh_a_spot_em)
+        spot_data.set_index('代码', inplace=True)
+        _spot_cache["df"] = spot_data
+        _spot_cache["ts"] = time.monotonic()
+        return spot_data
+
+
+async def _fetch_stock_info(stock_code: str) -> Dict[str, Any]:
+    """获取股票基本信息（按股票代码缓存，与服务实例无关）"""
+    cached = _stock_info_cache.get(stock_code)
+    if cached is not None and time.monotonic() < cached[1]:
+        return cached[0]
+    
+    try:
+        # 获取股票基本信息（akshare为同步接口，放到线程池中执行以免阻塞事件循环）
+        stock_info = await asyncio.to_thread(ak.stock_individual_info_em, symbol=stock_code)
+        if stock_info.empty:
+            raise StockNotFoundError(f"股票代码 {stock_code} 不存在")
+        
+        # 转换为字典格式
+        info_dict = dict(zip(stock_info['item'].tolist(), stock_info['value'].tolist()))
+    except Exception as e:
+        logger.error(f"获取股票基本信息失败: {stock_code}, 错误: {str(e)}")
+        raise StockDataError(f"获取股票基本信息失败: {str(e)}")
+    
+    # 基本信息中包含市盈率、市净率等估值指标，缓存时间与估值数据一致
+    current_time = time.monotonic()
+    if stock_code not in _stock_info_cache and len(_stock_info_cache) >= _MAX_CACHE:
+        expired_codes = [code for code, (_, expires_at) in _stock_info_cache.items() if expires_at <= current_time]
+        for code in expired_codes:
+            del _stock_info_cache[code]
+    if stock_code in _stock_info_cache or len(_stock_info_cache) < _MAX_CACHE:
+        _stock_info_cache[stock_code] = (info_dict, current_time + _VALUATION_TTL)
+    return info_dict
+
+
+def _has_data(analysis: BaseModel) -> bool:
+    """维度数据是否包含有效值（获取失败时各字段为空或为空列表）"""
+    return any(getattr(analysis, field) not in (None, []) for field in analysis.model_fields_set)
+
+
+def _report_dimensions(report: StockReport) -> Tuple[BaseModel, ...]:
+    """报告的四个维度"""
+    return (report.fundamental_analysis, report.valuation_analysis,
+            report.technical_analysis, report.sentiment_analysis)
+
+
+def _seconds_until_market_close(now: datetime) -> float:
+    """计算距离下一次收盘的秒数，now为北京时间"""
+    close = datetime.combine(now.date(), _MARKET_CLOSE, tzinfo=now.tzinfo)
+    if now >= close:
+        close += timedelta(days=1)
+    return (close - now).total_seconds()
+
+
 class StockService:
     """股票服务类"""
     
-    def __init__(self):
-        self._cache = {}
-        self._last_clear_cache = datetime.now()
+    def __init__(self, shared_cache: Optional[RedisCache] = None):
+        # 多工作进程共享的二级缓存，为空时只使用进程内缓存
+        self._shared_cache = shared_cache
+        # 报告缓存: cache_key -> (report, fresh_until, stale_until)
+        self._cache: Dict[str, Tuple[StockReport, float, float]] = {}
+        # 维度缓存: (stock_code, dimension) -> (analysis, expires_at)
+        self._dimension_cache: Dict[Tuple[str, str], Tuple[BaseModel, float]] = {}
+        # 日线历史行情缓存: (stock_code, end_date) -> (hist_data, expires_at)
+        self._hist_cache: Dict[Tuple[str, str], Tuple[pd.DataFrame, float]] = {}
+        self._refresh_tasks: Dict[str, asyncio.Task] = {}
+        # 正在获取中的报告: stock_code -> Task，用于合并并发的相同请求
+        self._inflight: Dict[str, asyncio.Task] = {}
+        # 过期时间小顶堆: (expires_at, key)，清理时只需弹出已过期的条目
+        self._expiry_heap: List[Tuple[float, str]] = []
+        self._dimension_expiry_heap: List[Tuple[float, Tuple[str, str]]] = []
+    
+    async def close(self):
+        """释放共享缓存连接"""
+        if self._shared_cache is not None:
+            await self._shared_cache.close()
     
     def _get_cache_key(self, stock_code: str) -> str:
         """生成缓存键"""
         return f"stock_{stock_code}"
     
-    def _is_cache_expired(self, cache_time: datetime) -> bool:
-        """检查缓存是否过期"""
-        return (datetime.now() - cache_time).seconds > settings.CACHE_TTL
-    
     def _clear_expired_cache(self):
         """清理过期缓存"""
-        current_time = datetime.now()
-        if (current_time - self._last_clear_cache).seconds > settings.CACHE_TTL:
-            expired_keys = []
-            for key, (data, cache_time) in self._cache.items():
-                if self._is_cache_expired(cache_time):
-                    expired_keys.append(key)
-            
-            for key in expired_keys:
+        current_time = time.monotonic()
+        cleared = 0
+        
+        while self._expiry_heap and self._expiry_heap[0][0] <= current_time:
+            expires_at, key = heapq.heappop(self._expiry_heap)
+            entry = self._cache.get(key)
+            # 条目已被重新写入时堆中的旧记录作废
+            if entry is not None and entry[2] == expires_at:
                 del self._cache[key]
-            
-            self._last_clear_cache = current_time
-            logger.info(f"清理了 {len(expired_keys)} 个过期缓存项")
+                cleared += 1
+        
+        while self._dimension_expiry_heap and self._dimension_expiry_heap[0][0] <= current_time:
+            expires_at, key = heapq.heappop(self._dimension_expiry_heap)
+            entry = self._dimension_cache.get(key)
+            if entry is not None and entry[1] == expires_at:
+                del self._dimension_cache[key]
+                cleared += 1
+        
+        if cleared:
+            logger.info(f"清理了 {cleared} 个过期缓存项")
     
-    @lru_cache(maxsize=settings.MAX_CACHE_SIZE)
-    def _get_stock_info(self, stock_code: str) -> Dict[str, Any]:
-        """获取股票基本信息"""
+    def _store_report(self, report: StockReport, fresh_ttl: float):
+        """缓存完整报告"""
+        cache_key = self._get_cache_key(report.code)
+        if cache_key not in self._cache and len(self._cache) >= _MAX_CACHE:
+            return
+        
+        fresh_until = time.monotonic() + fresh_ttl
+        stale_until = fresh_until + _CACHE_STALE_TTL
+        self._cache[cache_key] = (report, fresh_until, stale_until)
+        heapq.heappush(self._expiry_heap, (stale_until, cache_key))
+    
+    async def _get_dimension(self, stock_code: str, dimension: str,
+                             fetcher: Callable[[str], Awaitable[BaseModel]], ttl: int) -> BaseModel:
+        """获取单个维度的分析数据，各维度按自己的缓存时间独立缓存"""
+        key = (stock_code, dimension)
+        cached = self._dimension_cache.get(key)
+        if cached is not None and time.monotonic() < cached[1]:
+            return cached[0]
+        
+        analysis = await fetcher(stock_code)
+        # 获取失败时返回的是空模型，不写入缓存，以便下次请求重新获取
+        if _has_data(analysis) and (key in self._dimension_cache
+                                          or len(self._dimension_cache) < _MAX_CACHE * 4):
+            expires_at = time.monotonic() + ttl
+            self._dimension_cache[key] = (analysis, expires_at)
+            heapq.heappush(self._dimension_expiry_heap, (expires_at, key))
+        return analysis
+    
+    def _schedule_refresh(self, stock_code: str):
+        """在后台刷新股票报告，同一股票同时只有一个刷新任务"""
+        if stock_code in self._refresh_tasks:
+            return
+        
+        task = asyncio.create_task(self._refresh(stock_code))
+        self._refresh_tasks[stock_code] = task
+        task.add_done_callback(lambda _: self._refresh_tasks.pop(stock_code, None))
+    
+    async def _refresh(self, stock_code: str):
+        """后台刷新任务"""
         try:
-            # 获取股票基本信息
-            stock_info = ak.stock_individual_info_em(symbol=stock_code)
-            if stock_info.empty:
-                raise StockNotFoundError(f"股票代码 {stock_code} 不存在")
-            
-            # 转换为字典格式
-            info_dict = {}
-            for _, row in stock_info.iterrows():
-                info_dict[row['item']] = row['value']
-            
-            return info_dict
+            await self._load_report(stock_code)
         except Exception as e:
-            logger.error(f"获取股票基本信息失败: {stock_code}, 错误: {str(e)}")
-            raise StockDataError(f"获取股票基本信息失败: {str(e)}")
+            logger.warning(f"后台刷新股票数据失败: {stock_code}, 错误: {str(e)}")
+    
+    async def _get_stock_info(self, stock_code: str) -> Dict[str, Any]:
+        """获取股票基本信息"""
+        return await _fetch_stock_info(stock_code)
+    
+    async def _get_hist_data(self, stock_code: str) -> pd.DataFrame:
+        """获取日线历史行情，缓存到下一次收盘"""
+        # 日期和收盘时间均按北京时间计算，与服务器时区无关
+        now = datetime.now(_MARKET_TZ)
+        end_date = now.strftime("%Y%m%d")
+        key = (stock_code, end_date)
+        cached = self._hist_cache.get(key)
+        if cached is not None and time.monotonic() < cached[1]:
+            return cached[0]
+        
+        # 400个自然日覆盖60日均线和52周（约252个交易日）所需的数据
+        start_date = (now - timedelta(days=400)).strftime("%Y%m%d")
+        hist_data = await asyncio.to_thread(ak.stock_zh_a_hist, symbol=stock_code, period="daily",
+                                            start_date=start_date, end_date=end_date, adjust="")
+        # 获取为空时不写入缓存，以便下次请求重新获取
+        if hist_data.empty:
+            return hist_data
+        hist_data['收盘'] = pd.to_numeric(hist_data['收盘'], errors='coerce')
+        
+        current_time = time.monotonic()
+        if key not in self._hist_cache and len(self._hist_cache) >= _MAX_CACHE:
+            expired_keys = [k for k, (_, expires_at) in self._hist_cache.items() if expires_at <= current_time]
+            for k in expired_keys:
+                del self._hist_cache[k]
+        if key in self._hist_cache or len(self._hist_cache) < _MAX_CACHE:
+            self._hist_cache[key] = (hist_data, current_time + _seconds_until_market_close(now))
+        return hist_data
     
     def _safe_get_float(self, value: Any, default: Optional[float] = None) -> Optional[float]:
         """安全获取浮点数值"""
+        if value is None:
+            return default
+        # akshare多数字段已是数值类型，无需转换为字符串（bool按原逻辑走字符串转换，返回默认值）
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return float(value)
+        
+        s = str(value).strip()
+        if not s or s == '-':
+            return default
         try:
-            if value is None or value == '' or str(value).strip() == '-':
-                return default
-            return float(str(value).replace(',', '').replace('%', ''))
+            return float(s.translate(_NUM_STRIP))
         except (ValueError, TypeError):
             return default
     
@@ -102,10 +284,10 @@ class StockService:
         """获取基本面数据"""
         try:
             # 获取股票基本信息
-            stock_info = self._get_stock_info(stock_code)
+            stock_info = await self._get_stock_info(stock_code)
             
             # 获取财务指标
-            financial_analysis = ak.stock_financial_analysis_indicator(symbol=stock_code)
+            financial_analysis = await asyncio.to_thread(ak.stock_financial_analysis_indicator, symbol=stock_code)
             
             # 初始化返回数据
             fundamental_data = {}
@@ -129,7 +311,7 @@ class StockService:
                 fundamental_data['current_ratio'] = self._safe_get_float(latest_data.get('流动比率'))
                 fundamental_data['quick_ratio'] = self._safe_get_float(latest_data.get('速动比率'))
             
-            return FundamentalAnalysis(**fundamental_data)
+            return FundamentalAnalysis.model_construct(**fundamental_data)
         
         except Exception as e:
             logger.error(f"获取基本面数据失败: {stock_code}, 错误: {str(e)}")
@@ -139,7 +321,7 @@ class StockService:
         """获取估值数据"""
         try:
             # 获取估值指标
-            stock_info = self._get_stock_info(stock_code)
+            stock_info = await self._get_stock_info(stock_code)
             
             valuation_data = {
                 'pe_ratio_static': self._safe_get_float(stock_info.get('市盈率-静态')),
@@ -150,7 +332,7 @@ class StockService:
                 'dividend_yield': self._safe_get_float(stock_info.get('股息率')),
             }
             
-            return ValuationAnalysis(**valuation_data)
+            return ValuationAnalysis.model_construct(**valuation_data)
         
         except Exception as e:
             logger.error(f"获取估值数据失败: {stock_code}, 错误: {str(e)}")
@@ -160,17 +342,15 @@ class StockService:
         """获取技术面数据"""
         try:
             # 获取实时行情数据
-            current_data = ak.stock_zh_a_spot_em()
-            stock_current = current_data[current_data['代码'] == stock_code]
+            current_data = await _get_spot_snapshot()
             
             # 获取历史行情数据用于计算技术指标
-            hist_data = ak.stock_zh_a_hist(symbol=stock_code, period="daily", 
-                                          start_date="20240101", end_date="20241231", adjust="")
+            hist_data = await self._get_hist_data(stock_code)
             
             technical_data = {}
             
-            if not stock_current.empty:
-                current_row = stock_current.iloc[0]
+            if stock_code in current_data.index:
+                current_row = current_data.loc[stock_code]
                 technical_data['current_price'] = self._safe_get_float(current_row.get('最新价'))
                 technical_data['price_change'] = self._safe_get_float(current_row.get('涨跌额'))
                 technical_data['price_change_percent'] = self._safe_get_float(current_row.get('涨跌幅'))
@@ -182,17 +362,18 @@ class StockService:
             
             # 计算移动平均线
             if not hist_data.empty and len(hist_data) >= 60:
-                hist_data['收盘'] = pd.to_numeric(hist_data['收盘'], errors='coerce')
-                technical_data['ma_5'] = hist_data['收盘'].rolling(window=5).mean().iloc[-1]
-                technical_data['ma_10'] = hist_data['收盘'].rolling(window=10).mean().iloc[-1]
-                technical_data['ma_20'] = hist_data['收盘'].rolling(window=20).mean().iloc[-1]
-                technical_data['ma_60'] = hist_data['收盘'].rolling(window=60).mean().iloc[-1]
+                closes = hist_data['收盘'].to_numpy(dtype=np.float64, na_value=np.nan)
+                technical_data['ma_5'] = float(np.nanmean(closes[-5:]))
+                technical_data['ma_10'] = float(np.nanmean(closes[-10:]))
+                technical_data['ma_20'] = float(np.nanmean(closes[-20:]))
+                technical_data['ma_60'] = float(np.nanmean(closes[-60:]))
                 
-                # 计算52周高低点
-                technical_data['week_52_high'] = hist_data['收盘'].max()
-                technical_data['week_52_low'] = hist_data['收盘'].min()
+                # 计算52周高低点（约252个交易日）
+                week_52_closes = closes[-252:]
+                technical_data['week_52_high'] = float(np.nanmax(week_52_closes))
+                technical_data['week_52_low'] = float(np.nanmin(week_52_closes))
             
-            return TechnicalAnalysis(**technical_data)
+            return TechnicalAnalysis.model_construct(**technical_data)
         
         except Exception as e:
             logger.error(f"获取技术面数据失败: {stock_code}, 错误: {str(e)}")
@@ -205,7 +386,8 @@ class StockService:
             
             # 获取资金流向数据
             try:
-                flow_data = ak.stock_individual_fund_flow(stock=stock_code, market="sh" if stock_code.startswith('6') else "sz")
+                flow_data = await asyncio.to_thread(ak.stock_individual_fund_flow, stock=stock_code,
+                                                    market="sh" if stock_code.startswith('6') else "sz")
                 if not flow_data.empty:
                     latest_flow = flow_data.iloc[-1]
                     sentiment_data['main_net_inflow'] = self._safe_get_float(latest_flow.get('主力净流入-净额'))
@@ -218,13 +400,13 @@ class StockService:
             
             # 获取概念标签
             try:
-                concept_data = ak.stock_board_concept_cons_em(symbol="东方财富")
+                concept_data = await asyncio.to_thread(ak.stock_board_concept_cons_em, symbol="东方财富")
                 concepts = concept_data[concept_data['代码'] == stock_code]['板块名称'].tolist() if not concept_data.empty else []
                 sentiment_data['concept_labels'] = concepts[:10]  # 限制数量
             except Exception:
                 sentiment_data['concept_labels'] = []
             
-            return SentimentAnalysis(**sentiment_data)
+            return SentimentAnalysis.model_construct(**sentiment_data)
         
         except Exception as e:
             logger.error(f"获取消息面数据失败: {stock_code}, 错误: {str(e)}")
@@ -233,55 +415,114 @@ class StockService:
     async def get_full_stock_report(self, stock_code: str) -> StockReport:
         """获取完整的股票报告"""
         # 检查缓存
-        cache_key = self._get_cache_key(stock_code)
-        if cache_key in self._cache:
-            cached_data, cache_time = self._cache[cache_key]
-            if not self._is_cache_expired(cache_time):
+        cached = self._cache.get(self._get_cache_key(stock_code))
+        if cached is not None:
+            report, fresh_until, stale_until = cached
+            current_time = time.monotonic()
+            if current_time < fresh_until:
                 logger.info(f"从缓存获取股票数据: {stock_code}")
-                return cached_data
+                return report
+            if current_time < stale_until:
+                # 先返回旧数据，同时在后台刷新
+                logger.info(f"从过期缓存获取股票数据并后台刷新: {stock_code}")
+                self._schedule_refresh(stock_code)
+                return report
         
         # 清理过期缓存
         self._clear_expired_cache()
         
+        return await self._load_report(stock_code)
+    
+    async def _load_report(self, stock_code: str) -> StockReport:
+        """获取股票报告，同一股票的并发请求只执行一次实际的数据获取"""
+        task = self._inflight.get(stock_code)
+        if task is None:
+            # 数据获取在独立任务中执行，不受任意一个调用方被取消的影响
+            task = asyncio.ensure_future(self._fetch_report(stock_code))
+            self._inflight[stock_code] = task
+            task.add_done_callback(lambda done: self._inflight.pop(stock_code, None)
+                                   if self._inflight.get(stock_code) is done else None)
+        
+        return await asyncio.shield(task)
+    
+    async def _fetch_report(self, stock_code: str) -> StockReport:
+        """依次从共享缓存和数据源获取报告，并写入缓存"""
+        shared = None
+        if self._shared_cache is not None:
+            shared = await self._shared_cache.get_report(stock_code)
+            if shared is not None:
+                report, fresh_until = shared
+                remaining = fresh_until - time.time()
+                if remaining > 0:
+                    logger.info(f"从Redis缓存获取股票数据: {stock_code}")
+                    report.set_fresh_until(fresh_until)
+                    self._store_report(report, min(_L1_CACHE_TTL, remaining))
+                    return report
+        
+        try:
+            report = await self._build_report(stock_code)
+        except StockDataError:
+            # 过期时间超过保留时间的报告不再返回（Redis键的过期时间之外再做一次检查）
+            if shared is None or time.time() - shared[1] > _REDIS_FALLBACK_TTL:
+                raise
+            return self._serve_stale(shared[0])
+        
+        has_data = [_has_data(analysis) for analysis in _report_dimensions(report)]
+        if shared is not None and time.time() - shared[1] <= _PARTIAL_FALLBACK_TTL:
+            # 旧报告中有数据的维度本次获取为空，说明数据源可能部分不可用，短时间内不用降级报告覆盖旧报告；
+            # 超过PARTIAL_FALLBACK_TTL后视为该维度确实没有数据，接受新报告
+            old_has_data = [_has_data(analysis) for analysis in _report_dimensions(shared[0])]
+            if any(old and not new for old, new in zip(old_has_data, has_data)):
+                return self._serve_stale(shared[0])
+        
+        if not any(has_data):
+            # 所有维度均获取失败，不写入缓存
+            logger.warning(f"所有维度数据获取失败，报告不写入缓存: {stock_code}")
+            return report
+        
+        report.set_fresh_until(time.time() + _REPORT_TTL)
+        if self._shared_cache is None:
+            self._store_report(report, _REPORT_TTL)
+        else:
+            # 启用共享缓存时进程内缓存只保留很短时间，以便及时获取其他进程的更新
+            self._store_report(report, _L1_CACHE_TTL)
+            await self._shared_cache.set_report(report, _REPORT_TTL, _REPORT_TTL + _REDIS_FALLBACK_TTL)
+        return report
+    
+    def _serve_stale(self, report: StockReport) -> StockReport:
+        """数据源不可用时返回Redis中的过期报告，并在进程内短暂缓存以限制重试频率"""
+        logger.warning(f"数据源不可用，返回Redis中的过期报告: {report.code}")
+        report.mark_stale()
+        self._store_report(report, _L1_CACHE_TTL)
+        return report
+    
+    async def _build_report(self, stock_code: str) -> StockReport:
+        """获取各维度数据并构建完整报告"""
         try:
             # 验证股票代码是否存在
-            stock_info = self._get_stock_info(stock_code)
+            stock_info = await self._get_stock_info(stock_code)
             stock_name = stock_info.get('股票简称', '')
             
             if not stock_name:
                 raise StockNotFoundError(f"未找到股票代码 {stock_code} 对应的股票")
             
             # 并发获取各维度数据
-            fundamental_task = self._get_fundamental_data(stock_code)
-            valuation_task = self._get_valuation_data(stock_code)
-            technical_task = self._get_technical_data(stock_code)
-            sentiment_task = self._get_sentiment_data(stock_code)
+            fundamental_task = self._get_dimension(stock_code, 'fundamental', self._get_fundamental_data,
+                                                   _FUNDAMENTAL_TTL)
+            valuation_task = self._get_dimension(stock_code, 'valuation', self._get_valuation_data,
+                                                 _VALUATION_TTL)
+            technical_task = self._get_dimension(stock_code, 'technical', self._get_technical_data,
+                                                 _TECHNICAL_TTL)
+            sentiment_task = self._get_dimension(stock_code, 'sentiment', self._get_sentiment_data,
+                                                 _SENTIMENT_TTL)
             
-            # 等待所有任务完成
+            # 等待所有任务完成（各维度方法内部已处理异常并返回空模型）
             fundamental_analysis, valuation_analysis, technical_analysis, sentiment_analysis = await asyncio.gather(
-                fundamental_task, valuation_task, technical_task, sentiment_task,
-                return_exceptions=True
+                fundamental_task, valuation_task, technical_task, sentiment_task
             )
             
-            # 处理异常结果
-            if isinstance(fundamental_analysis, Exception):
-                logger.error(f"基本面数据获取异常: {fundamental_analysis}")
-                fundamental_analysis = FundamentalAnalysis()
-            
-            if isinstance(valuation_analysis, Exception):
-                logger.error(f"估值数据获取异常: {valuation_analysis}")
-                valuation_analysis = ValuationAnalysis()
-            
-            if isinstance(technical_analysis, Exception):
-                logger.error(f"技术面数据获取异常: {technical_analysis}")
-                technical_analysis = TechnicalAnalysis()
-            
-            if isinstance(sentiment_analysis, Exception):
-                logger.error(f"消息面数据获取异常: {sentiment_analysis}")
-                sentiment_analysis = SentimentAnalysis()
-            
-            # 构建完整报告
-            report = StockReport(
+            # 构建完整报告（各字段已在提取时完成类型转换，跳过重复的Pydantic验证）
+            report = StockReport.model_construct(
                 code=stock_code,
                 name=stock_name,
                 update_time=datetime.now(),
@@ -291,10 +532,6 @@ class StockService:
                 sentiment_analysis=sentiment_analysis
             )
             
-            # 缓存结果
-            if len(self._cache) < settings.MAX_CACHE_SIZE:
-                self._cache[cache_key] = (report, datetime.now())
-            
             logger.info(f"成功获取股票完整报告: {stock_code} - {stock_name}")
             return report
         
@@ -307,4 +544,10 @@ class StockService:
 
 
 # 全局股票服务实例
-stock_service = StockService() 
\ No newline at end of file
+stock_service = StockService(
+    RedisCache(
+        settings.REDIS_URL,
+        socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+        socket_connect_timeout=settings.REDIS_CONNECT_TIMEOUT,
+    ) if settings.REDIS_URL else None
+) 
\ No newline at end of file
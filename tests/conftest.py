@@ -0,0 +1,69 @@
+"""
+测试公共夹具
+"""
+import asyncio
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+from app.services import stock_service as stock_service_module
+
+
+class FakeAkshare:
+    """伪造的akshare接口，记录调用次数并模拟网络延迟"""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.calls = {}
+        self._lock = threading.Lock()
+
+    def _record(self, name: str):
+        with self._lock:
+            self.calls[name] = self.calls.get(name, 0) + 1
+        if self.delay:
+            time.sleep(self.delay)
+
+    def stock_individual_info_em(self, symbol):
+        self._record("stock_individual_info_em")
+        return pd.DataFrame({
+            "item": ["股票简称", "总市值", "流通市值", "市盈率TTM", "市净率"],
+            "value": ["贵州茅台", "2,500", "2,400", "35.2", "8.5%"],
+        })
+
+    def stock_financial_analysis_indicator(self, symbol):
+        self._record("stock_financial_analysis_indicator")
+        return pd.DataFrame([{"净资产收益率": "25.5", "流动比率": 3.2}])
+
+    def stock_zh_a_spot_em(self):
+        self._record("stock_zh_a_spot_em")
+        return pd.DataFrame([
+            {"代码": "600519", "最新价": 1680.0, "涨跌额": 40.0, "涨跌幅": 2.5, "成交量": 1500000},
+            {"代码": "000001", "最新价": 10.0, "涨跌额": -0.1, "涨跌幅": -1.0, "成交量": 900000},
+        ])
+
+    def stock_zh_a_hist(self, symbol, period, start_date, end_date, adjust):
+        self._record("stock_zh_a_hist")
+        self.hist_window = (start_date, end_date)
+        return pd.DataFrame({"收盘": [float(i) for i in range(1, 301)]})
+
+    def stock_individual_fund_flow(self, stock, market):
+        self._record("stock_individual_fund_flow")
+        return pd.DataFrame([{"主力净流入-净额": "5,000"}])
+
+    def stock_board_concept_cons_em(self, symbol):
+        self._record("stock_board_concept_cons_em")
+        return pd.DataFrame([{"代码": "600519", "板块名称": "白酒"}])
+
+
+@pytest.fixture
+def fake_ak(monkeypatch):
+    """将服务模块中的akshare替换为伪造实现"""
+    fake = FakeAkshare()
+    monkeypatch.setattr(stock_service_module, "ak", fake)
+    monkeypatch.setitem(stock_service_module._spot_cache, "df", None)
+    monkeypatch.setitem(stock_service_module._spot_cache, "ts", 0.0)
+    monkeypatch.setitem(stock_service_module._spot_cache, "lock", asyncio.Lock())
+    monkeypatch.setattr(stock_service_module, "_stock_info_cache", {})
+    return fake
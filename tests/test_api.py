@@ -2,9 +2,15 @@
 API端点测试
 针对API端点的单元测试和集成测试
 """
+import time
+
 import pytest
+import pandas as pd
 from fastapi.testclient import TestClient
+from app import main as main_module
 from app.main import app
+from app.models.stock_models import StockReport
+from app.services.stock_service import StockService
 
 # 创建测试客户端
 client = TestClient(app)
@@ -63,6 +69,73 @@ class TestStockAPI:
         # 这个代码大概率不存在，应该返回404
         assert response.status_code in [404, 500]  # 可能是404或500
     
+    def test_full_report_schema(self, fake_ak, monkeypatch):
+        """测试完整报告的响应结构符合StockReport模型"""
+        monkeypatch.setattr(main_module, "stock_service", StockService())
+        response = client.get("/api/v1/stock/full-report?code=600519")
+        assert response.status_code == 200
+        data = response.json()
+        assert set(data) == set(StockReport.model_fields)
+        report = StockReport.model_validate(data)
+        assert report.code == "600519"
+        assert report.name == "贵州茅台"
+        assert report.fundamental_analysis.market_cap == 2500.0
+        assert report.technical_analysis.current_price == 1680.0
+        assert report.sentiment_analysis.concept_labels == ["白酒"]
+        # 值为空的字段不出现在响应中
+        assert "total_shares" not in data["fundamental_analysis"]
+        assert None not in data["technical_analysis"].values()
+    
+    def test_full_report_etag(self, fake_ak, monkeypatch):
+        """测试完整报告的ETag和条件请求"""
+        monkeypatch.setattr(main_module, "stock_service", StockService())
+        response = client.get("/api/v1/stock/full-report?code=600519")
+        assert response.status_code == 200
+        etag = response.headers["ETag"]
+        assert response.headers["Cache-Control"].startswith("public, max-age=")
+        
+        response = client.get("/api/v1/stock/full-report?code=600519", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.headers["ETag"] == etag
+        assert response.content == b""
+        
+        response = client.get("/api/v1/stock/full-report?code=600519", headers={"If-None-Match": '"stale"'})
+        assert response.status_code == 200
+    
+    def test_full_report_cache_control(self, fake_ak, monkeypatch):
+        """测试Cache-Control按报告剩余新鲜期计算，过期副本要求重新验证"""
+        service = StockService()
+        monkeypatch.setattr(main_module, "stock_service", service)
+        response = client.get("/api/v1/stock/full-report?code=600519")
+        max_age = int(response.headers["Cache-Control"].split("max-age=")[1].split(",")[0])
+        assert 0 < max_age <= 60
+        
+        # 模拟报告已过新鲜期，处于后台刷新窗口内
+        cache_key = service._get_cache_key("600519")
+        report, _, stale_until = service._cache[cache_key]
+        service._cache[cache_key] = (report, time.monotonic() - 1, stale_until)
+        report.set_fresh_until(time.time() - 1)
+        monkeypatch.setattr(service, "_schedule_refresh", lambda stock_code: None)
+        response = client.get("/api/v1/stock/full-report?code=600519")
+        assert response.status_code == 200
+        assert response.headers["Cache-Control"] == "no-cache"
+    
+    def test_full_report_stale_warning(self, fake_ak, monkeypatch):
+        """测试返回过期报告时带有Warning响应头"""
+        service = StockService()
+        monkeypatch.setattr(main_module, "stock_service", service)
+        
+        async def stale_report(stock_code):
+            report = await StockService().get_full_stock_report(stock_code)
+            report.mark_stale()
+            return report
+        
+        monkeypatch.setattr(service, "get_full_stock_report", stale_report)
+        response = client.get("/api/v1/stock/full-report?code=600519")
+        assert response.status_code == 200
+        assert response.headers["Warning"] == '110 - "Response is Stale"'
+        assert response.headers["Cache-Control"] == "no-cache"
+    
     def test_stock_info_endpoint(self):
         """测试股票基本信息端点"""
         response = client.get("/api/v1/stock/info?code=600519")
@@ -84,6 +157,26 @@ class TestErrorHandling:
         """测试不允许的HTTP方法"""
         response = client.post("/api/v1/stock/full-report")
         assert response.status_code == 405
+    
+    def test_full_report_not_found(self, fake_ak, monkeypatch):
+        """测试股票不存在时由异常处理中间件返回404"""
+        monkeypatch.setattr(main_module, "stock_service", StockService())
+        monkeypatch.setattr(fake_ak, "stock_individual_info_em",
+                            lambda symbol: pd.DataFrame({"item": ["总市值"], "value": ["2,500"]}))
+        response = client.get("/api/v1/stock/full-report?code=999999")
+        assert response.status_code == 404
+        assert response.json() == {"detail": "未找到股票代码 999999 对应的股票"}
+    
+    def test_full_report_data_error(self, fake_ak, monkeypatch):
+        """测试数据源不可用时由异常处理中间件返回500"""
+        def failing_info(symbol):
+            raise ConnectionError("网络超时")
+        
+        monkeypatch.setattr(main_module, "stock_service", StockService())
+        monkeypatch.setattr(fake_ak, "stock_individual_info_em", failing_info)
+        response = client.get("/api/v1/stock/full-report?code=600519")
+        assert response.status_code == 500
+        assert response.json() == {"detail": "股票数据获取失败: 获取股票数据失败: 获取股票基本信息失败: 网络超时"}
 
 
 # 如果需要测试异步功能，可以使用pytest-asyncio
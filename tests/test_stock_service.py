@@ -0,0 +1,394 @@
+"""
+股票服务测试
+使用伪造的akshare数据源测试服务层逻辑
+"""
+import asyncio
+import heapq
+import time
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+import pandas as pd
+import pytest
+
+from app.services import stock_service as stock_service_module
+from app.services.cache import RedisCache
+from app.services.stock_service import StockService, StockDataError
+
+
+class FakeRedisClient:
+    """伪造的Redis异步客户端，数据保存在内存中"""
+
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.data[key] = value
+
+    async def aclose(self):
+        pass
+
+
+@pytest.fixture
+def shared_cache(monkeypatch):
+    """使用伪造客户端的Redis缓存"""
+    cache = RedisCache("redis://localhost:6379/0")
+    monkeypatch.setattr(cache, "_client", FakeRedisClient())
+    return cache
+
+
+class TestStockService:
+    """股票服务测试"""
+
+    @pytest.mark.asyncio
+    async def test_full_report(self, fake_ak):
+        """测试完整报告的组装"""
+        service = StockService()
+        report = await service.get_full_stock_report("600519")
+        assert report.code == "600519"
+        assert report.name == "贵州茅台"
+        assert report.fundamental_analysis.market_cap == 2500.0
+        assert report.fundamental_analysis.roe == 25.5
+        assert report.valuation_analysis.pb_ratio == 8.5
+        assert report.technical_analysis.current_price == 1680.0
+        assert report.technical_analysis.ma_5 == 298.0
+        assert report.technical_analysis.ma_60 == 270.5
+        assert report.technical_analysis.week_52_high == 300.0
+        assert report.technical_analysis.week_52_low == 49.0
+        assert report.sentiment_analysis.main_net_inflow == 5000.0
+        assert report.sentiment_analysis.concept_labels == ["白酒"]
+
+    @pytest.mark.asyncio
+    async def test_stock_info_is_cached(self, fake_ak):
+        """测试股票基本信息只请求一次"""
+        await StockService().get_full_stock_report("600519")
+        # 缓存与服务实例无关，新实例同样命中缓存
+        await StockService().get_full_stock_report("600519")
+        assert fake_ak.calls["stock_individual_info_em"] == 1
+
+    @pytest.mark.asyncio
+    async def test_akshare_calls_run_concurrently(self, fake_ak):
+        """测试各维度的akshare调用在线程池中并发执行"""
+        fake_ak.delay = 0.2
+        service = StockService()
+        start = time.monotonic()
+        await service.get_full_stock_report("600519")
+        elapsed = time.monotonic() - start
+        # 串行执行约需 7 * 0.2 秒，并发执行时远小于该值
+        assert elapsed < 1.0
+
+    @pytest.mark.asyncio
+    async def test_spot_snapshot_is_shared(self, fake_ak):
+        """测试并发请求共享同一份全市场行情快照"""
+        fake_ak.delay = 0.05
+        service = StockService()
+        first, second = await asyncio.gather(
+            service.get_full_stock_report("600519"),
+            service.get_full_stock_report("000001"),
+        )
+        assert first.technical_analysis.current_price == 1680.0
+        assert second.technical_analysis.current_price == 10.0
+        assert fake_ak.calls["stock_zh_a_spot_em"] == 1
+
+    @pytest.mark.asyncio
+    async def test_stale_report_is_served_while_refreshing(self, fake_ak):
+        """测试报告过期后先返回旧数据，并在后台刷新"""
+        service = StockService()
+        first = await service.get_full_stock_report("600519")
+        cache_key = service._get_cache_key("600519")
+        report, _, stale_until = service._cache[cache_key]
+        service._cache[cache_key] = (report, time.monotonic() - 1, stale_until)
+
+        second = await service.get_full_stock_report("600519")
+        assert second is first
+        await asyncio.gather(*service._refresh_tasks.values())
+        refreshed, fresh_until, _ = service._cache[cache_key]
+        assert refreshed is not first
+        assert fresh_until > time.monotonic()
+
+    @pytest.mark.asyncio
+    async def test_dimensions_are_cached_independently(self, fake_ak):
+        """测试报告过期时未过期的维度数据不会重新获取"""
+        service = StockService()
+        await service.get_full_stock_report("600519")
+        service._cache.clear()
+        key = ("600519", "technical")
+        analysis, _ = service._dimension_cache[key]
+        service._dimension_cache[key] = (analysis, time.monotonic() - 1)
+
+        await service.get_full_stock_report("600519")
+        assert fake_ak.calls["stock_financial_analysis_indicator"] == 1
+        assert service._dimension_cache[key][1] > time.monotonic()
+
+    @pytest.mark.asyncio
+    async def test_concurrent_requests_are_coalesced(self, fake_ak):
+        """测试同一股票的并发请求只触发一次数据获取"""
+        fake_ak.delay = 0.05
+        service = StockService()
+        reports = await asyncio.gather(*(service.get_full_stock_report("600519") for _ in range(5)))
+        assert all(report is reports[0] for report in reports)
+        assert fake_ak.calls["stock_individual_info_em"] == 1
+        assert fake_ak.calls["stock_financial_analysis_indicator"] == 1
+        assert not service._inflight
+
+    @pytest.mark.asyncio
+    async def test_coalesced_requests_share_errors(self, fake_ak, monkeypatch):
+        """测试合并的请求共享同一个异常"""
+        def failing_info(symbol):
+            time.sleep(0.05)
+            raise ConnectionError("network down")
+
+        monkeypatch.setattr(fake_ak, "stock_individual_info_em", failing_info)
+        service = StockService()
+        results = await asyncio.gather(
+            *(service.get_full_stock_report("600519") for _ in range(3)),
+            return_exceptions=True,
+        )
+        assert all(isinstance(result, StockDataError) for result in results)
+        assert not service._inflight
+
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_does_not_affect_others(self, fake_ak):
+        """测试取消一个合并的请求不影响发起者和其他等待者"""
+        fake_ak.delay = 0.05
+        service = StockService()
+        leader = asyncio.create_task(service.get_full_stock_report("600519"))
+        await asyncio.sleep(0)
+        waiters = [asyncio.create_task(service.get_full_stock_report("600519")) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        waiters[0].cancel()
+
+        report = await leader
+        assert report.name == "贵州茅台"
+        assert await waiters[1] is report
+        assert await waiters[2] is report
+        with pytest.raises(asyncio.CancelledError):
+            await waiters[0]
+        assert fake_ak.calls["stock_individual_info_em"] == 1
+
+    @pytest.mark.asyncio
+    async def test_cancelled_leader_does_not_affect_waiters(self, fake_ak):
+        """测试取消发起请求的调用方不影响等待者"""
+        fake_ak.delay = 0.05
+        service = StockService()
+        leader = asyncio.create_task(service.get_full_stock_report("600519"))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(service.get_full_stock_report("600519"))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+
+        report = await waiter
+        assert report.name == "贵州茅台"
+        assert not service._inflight
+
+    def test_safe_get_float(self):
+        """测试数值解析"""
+        service = StockService()
+        assert service._safe_get_float(3) == 3.0
+        assert service._safe_get_float(1.5) == 1.5
+        assert service._safe_get_float("1,234.5") == 1234.5
+        assert service._safe_get_float(" 12.5% ") == 12.5
+        assert service._safe_get_float(None) is None
+        assert service._safe_get_float("") is None
+        assert service._safe_get_float("-") is None
+        assert service._safe_get_float("abc", default=0.0) == 0.0
+        assert service._safe_get_float(True) is None
+
+    @pytest.mark.asyncio
+    async def test_hist_data_is_cached_for_the_day(self, fake_ak):
+        """测试日线历史行情按日期窗口获取并在当日缓存"""
+        service = StockService()
+        await service.get_full_stock_report("600519")
+        service._cache.clear()
+        service._dimension_cache.clear()
+        await service.get_full_stock_report("600519")
+
+        now = datetime.now(ZoneInfo("Asia/Shanghai"))
+        assert fake_ak.hist_window == (
+            (now - timedelta(days=400)).strftime("%Y%m%d"),
+            now.strftime("%Y%m%d"),
+        )
+        assert fake_ak.calls["stock_zh_a_hist"] == 1
+
+    @pytest.mark.asyncio
+    async def test_empty_hist_data_is_not_cached(self, fake_ak, monkeypatch):
+        """测试获取为空的日线历史行情不写入缓存"""
+        monkeypatch.setattr(fake_ak, "stock_zh_a_hist", lambda **kwargs: pd.DataFrame())
+        service = StockService()
+        assert (await service._get_hist_data("600519")).empty
+        assert not service._hist_cache
+
+    def test_seconds_until_market_close(self):
+        """测试按北京时间计算距离收盘的时间"""
+        beijing = ZoneInfo("Asia/Shanghai")
+        assert stock_service_module._seconds_until_market_close(
+            datetime(2026, 10, 14, 9, 30, tzinfo=beijing)) == 5.5 * 3600
+        assert stock_service_module._seconds_until_market_close(
+            datetime(2026, 10, 14, 16, 0, tzinfo=beijing)) == 23 * 3600
+
+    @pytest.mark.asyncio
+    async def test_clear_expired_cache(self, fake_ak):
+        """测试只清理真正过期的缓存条目"""
+        service = StockService()
+        await service.get_full_stock_report("600519")
+        await service.get_full_stock_report("000001")
+        expired_key = service._get_cache_key("600519")
+        report, fresh_until, _ = service._cache[expired_key]
+        service._cache[expired_key] = (report, fresh_until, time.monotonic() - 1)
+        heapq.heappush(service._expiry_heap, (service._cache[expired_key][2], expired_key))
+
+        service._clear_expired_cache()
+        assert expired_key not in service._cache
+        assert service._get_cache_key("000001") in service._cache
+
+
+class TestSharedCache:
+    """Redis共享缓存测试"""
+
+    @pytest.mark.asyncio
+    async def test_report_round_trip(self, fake_ak, shared_cache):
+        """测试报告写入Redis后可完整读回"""
+        report = await StockService().get_full_stock_report("600519")
+        await shared_cache.set_report(report, 60, 3600)
+        cached, fresh_until = await shared_cache.get_report("600519")
+        assert cached.model_dump() == report.model_dump()
+        assert fresh_until > time.time()
+        assert await shared_cache.get_report("000001") is None
+
+    @pytest.mark.asyncio
+    async def test_hanging_redis_is_a_miss(self, fake_ak):
+        """测试Redis无响应时按超时处理为缓存未命中"""
+        async def hang(reader, writer):
+            await asyncio.sleep(10)
+
+        server = await asyncio.start_server(hang, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        cache = RedisCache(f"redis://127.0.0.1:{port}/0", socket_timeout=0.1, socket_connect_timeout=0.1)
+        try:
+            report = await StockService().get_full_stock_report("600519")
+            start = time.monotonic()
+            assert await cache.get_report("600519") is None
+            await cache.set_report(report, 60, 3600)
+            assert time.monotonic() - start < 2.0
+        finally:
+            await cache.close()
+            server.close()
+
+    @pytest.mark.asyncio
+    async def test_workers_share_reports(self, fake_ak, shared_cache):
+        """测试不同工作进程的服务实例通过Redis共享报告"""
+        first = await StockService(shared_cache).get_full_stock_report("600519")
+        second = await StockService(shared_cache).get_full_stock_report("600519")
+        assert second.model_dump() == first.model_dump()
+        assert fake_ak.calls["stock_financial_analysis_indicator"] == 1
+
+    @pytest.mark.asyncio
+    async def test_stale_report_fallback(self, fake_ak, shared_cache, monkeypatch):
+        """测试数据源不可用时返回Redis中的过期报告"""
+        report = await StockService().get_full_stock_report("600519")
+        await shared_cache.set_report(report, -1, 3600)
+
+        def failing_info(symbol):
+            raise ConnectionError("network down")
+
+        monkeypatch.setattr(stock_service_module, "_stock_info_cache", {})
+        monkeypatch.setattr(fake_ak, "stock_individual_info_em", failing_info)
+        fallback = await StockService(shared_cache).get_full_stock_report("600519")
+        assert fallback.model_dump() == report.model_dump()
+        assert fallback.is_stale
+
+    @pytest.mark.asyncio
+    async def test_missing_report_still_fails(self, fake_ak, shared_cache, monkeypatch):
+        """测试没有可用缓存时数据源错误照常抛出"""
+        def failing_info(symbol):
+            raise ConnectionError("network down")
+
+        monkeypatch.setattr(fake_ak, "stock_individual_info_em", failing_info)
+        with pytest.raises(StockDataError):
+            await StockService(shared_cache).get_full_stock_report("600519")
+
+    @pytest.mark.asyncio
+    async def test_degraded_report_does_not_replace_good_one(self, fake_ak, shared_cache, monkeypatch):
+        """测试数据源部分不可用时返回Redis中的过期报告，且不覆盖Redis中的报告"""
+        report = await StockService().get_full_stock_report("600519")
+        await shared_cache.set_report(report, -1, 3600)
+
+        def failing(*args, **kwargs):
+            raise ConnectionError("network down")
+
+        # 股票基本信息仍在缓存中，其余接口均不可用
+        for name in ("stock_financial_analysis_indicator", "stock_zh_a_spot_em", "stock_zh_a_hist",
+                     "stock_individual_fund_flow", "stock_board_concept_cons_em"):
+            monkeypatch.setattr(fake_ak, name, failing)
+        monkeypatch.setitem(stock_service_module._spot_cache, "df", None)
+
+        fallback = await StockService(shared_cache).get_full_stock_report("600519")
+        assert fallback.is_stale
+        assert fallback.technical_analysis.current_price == 1680.0
+        assert fallback.fundamental_analysis.roe == 25.5
+
+        cached, fresh_until = await shared_cache.get_report("600519")
+        assert cached.technical_analysis.current_price == 1680.0
+        assert fresh_until < time.time()
+
+    @pytest.mark.asyncio
+    async def test_stale_fallback_is_cached_in_process(self, fake_ak, shared_cache, monkeypatch):
+        """测试返回的过期报告写入进程内缓存，数据源不可用期间不会每次请求都重新获取"""
+        report = await StockService().get_full_stock_report("600519")
+        await shared_cache.set_report(report, -1, 3600)
+
+        failures = []
+
+        def failing(*args, **kwargs):
+            failures.append(1)
+            raise ConnectionError("network down")
+
+        for name in ("stock_zh_a_spot_em", "stock_zh_a_hist"):
+            monkeypatch.setattr(fake_ak, name, failing)
+        monkeypatch.setitem(stock_service_module._spot_cache, "df", None)
+
+        service = StockService(shared_cache)
+        for _ in range(5):
+            fallback = await service.get_full_stock_report("600519")
+            assert fallback.is_stale
+        assert len(failures) == 1
+        assert service._cache[service._get_cache_key("600519")][0].is_stale
+
+    @pytest.mark.asyncio
+    async def test_partial_fallback_is_time_limited(self, fake_ak, shared_cache, monkeypatch):
+        """测试过期太久的报告不再阻止部分维度为空的新报告写入缓存"""
+        report = await StockService().get_full_stock_report("600519")
+        await shared_cache.set_report(report, -stock_service_module._PARTIAL_FALLBACK_TTL - 1, 86400)
+
+        # 该股票已没有资金流向和概念数据
+        monkeypatch.setattr(fake_ak, "stock_individual_fund_flow", lambda stock, market: pd.DataFrame())
+        monkeypatch.setattr(fake_ak, "stock_board_concept_cons_em", lambda symbol: pd.DataFrame())
+
+        fresh = await StockService(shared_cache).get_full_stock_report("600519")
+        assert not fresh.is_stale
+        assert fresh.sentiment_analysis.main_net_inflow is None
+
+        cached, fresh_until = await shared_cache.get_report("600519")
+        assert cached.sentiment_analysis.main_net_inflow is None
+        assert fresh_until > time.time()
+
+    @pytest.mark.asyncio
+    async def test_empty_report_is_not_cached(self, fake_ak, shared_cache, monkeypatch):
+        """测试所有维度均获取失败的报告不写入缓存"""
+        def failing(*args, **kwargs):
+            raise ConnectionError("network down")
+
+        for name in ("stock_financial_analysis_indicator", "stock_zh_a_spot_em", "stock_zh_a_hist",
+                     "stock_individual_fund_flow", "stock_board_concept_cons_em"):
+            monkeypatch.setattr(fake_ak, name, failing)
+        monkeypatch.setattr(fake_ak, "stock_individual_info_em",
+                            lambda symbol: pd.DataFrame({"item": ["股票简称"], "value": ["贵州茅台"]}))
+
+        service = StockService(shared_cache)
+        report = await service.get_full_stock_report("600519")
+        assert not report.is_stale
+        assert await shared_cache.get_report("600519") is None
+        assert service._get_cache_key("600519") not in service._cache